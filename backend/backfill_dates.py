@@ -0,0 +1,41 @@
+from dotenv import load_dotenv
+load_dotenv()  # Load .env before other imports
+
+from database import get_db
+from utils.dates import parse_date_range
+
+
+def main():
+    """Populate start_date/end_date for rows written before migration 004. Safe to re-run."""
+    conn = get_db()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT id, date_range
+        FROM experiences
+        WHERE date_range IS NOT NULL AND start_date IS NULL
+    """)
+    rows = cur.fetchall()
+
+    parsed = 0
+    for experience_id, date_range in rows:
+        start_date, end_date = parse_date_range(date_range)
+        if start_date is None:
+            print(f"⚠️  Could not parse date range for {experience_id}: {date_range!r}")
+            continue
+
+        cur.execute(
+            "UPDATE experiences SET start_date = %s, end_date = %s WHERE id = %s",
+            (start_date, end_date, experience_id)
+        )
+        parsed += 1
+
+    conn.commit()
+    print(f"✅ Parsed dates for {parsed} of {len(rows)} experiences")
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Online re-embedding of experiences into a new embedding model.
+
+    python backfill_embeddings.py start embed-english-v3.0
+    python backfill_embeddings.py run --batches-per-minute 30
+    python backfill_embeddings.py cutover
+    python backfill_embeddings.py drop-previous
+
+`start` adds shadow columns (embedding_next, embedding_next_model) and a trigger
+that clears the shadow vector whenever content changes. `run` fills the shadow
+column in throttled batches; it is safe to stop and rerun at any point. `cutover`
+swaps the shadow columns in with metadata-only renames inside one transaction,
+so search keeps serving the old model right up to the switch. The previous
+vectors are kept as embedding_prev until `drop-previous`.
+
+Rows Cohere rejects are skipped by `run` and reported. `cutover --allow-missing N`
+switches anyway and hands those rows to the embedding worker.
+"""
+import argparse
+import re
+import sys
+import time
+
+from dotenv import load_dotenv
+load_dotenv()  # Load .env before other imports
+
+from database import get_db
+from utils.embeddings import EMBEDDING_MODELS, get_embeddings_batch, is_rejection
+
+# Cohere accepts up to 96 texts per embed call
+DEFAULT_BATCH_SIZE = 96
+ERROR_BACKOFF = 30
+LOCK_TIMEOUT = "10s"
+
+
+def index_name(model: str) -> str:
+    return "experiences_embedding_" + re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_") + "_idx"
+
+
+def get_backfilling_model(cur) -> str:
+    cur.execute("SELECT model FROM embedding_models WHERE state = 'backfilling'")
+    row = cur.fetchone()
+    if not row:
+        sys.exit("No backfill in progress. Run `start <model>` first.")
+    return row[0]
+
+
+def column_exists(cur, column: str) -> bool:
+    cur.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'experiences' AND column_name = %s
+    """, (column,))
+    return cur.fetchone() is not None
+
+
+def start(model: str):
+    if model not in EMBEDDING_MODELS:
+        sys.exit(f"Unknown model {model}. Known models: {', '.join(EMBEDDING_MODELS)}")
+
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+
+    cur.execute("SELECT model, state FROM embedding_models WHERE state IN ('active', 'backfilling')")
+    for existing, state in cur.fetchall():
+        if existing == model and state == "active":
+            sys.exit(f"{model} is already the active model.")
+        if state == "backfilling" and existing != model:
+            sys.exit(f"A backfill to {existing} is already in progress.")
+
+    if column_exists(cur, "embedding_prev"):
+        sys.exit("Previous vectors from the last cutover still exist. Run `drop-previous` first.")
+
+    cur.execute("""
+        INSERT INTO embedding_models (model, dimensions, state)
+        VALUES (%s, %s, 'backfilling')
+        ON CONFLICT (model) DO UPDATE SET state = 'backfilling', activated_at = NULL
+    """, (model, EMBEDDING_MODELS[model]))
+
+    # Adding nullable columns without a default is a catalog-only change
+    cur.execute(f"""
+        ALTER TABLE experiences
+            ADD COLUMN IF NOT EXISTS embedding_next vector({EMBEDDING_MODELS[model]}),
+            ADD COLUMN IF NOT EXISTS embedding_next_model TEXT
+    """)
+
+    # Edits made during the backfill invalidate the shadow vector so `run` picks them up again
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION experiences_invalidate_embedding_next() RETURNS trigger AS $$
+        BEGIN
+            NEW.embedding_next := NULL;
+            NEW.embedding_next_model := NULL;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS experiences_invalidate_embedding_next ON experiences")
+    cur.execute("""
+        CREATE TRIGGER experiences_invalidate_embedding_next
+        BEFORE UPDATE OF content ON experiences
+        FOR EACH ROW
+        WHEN (OLD.content IS DISTINCT FROM NEW.content)
+        EXECUTE FUNCTION experiences_invalidate_embedding_next()
+    """)
+    conn.commit()
+
+    # Rows still to do; keeps `run` and the cutover check off a full scan
+    conn.autocommit = True
+    cur.execute("RESET lock_timeout")
+    cur.execute("""
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS experiences_embedding_next_todo_idx
+        ON experiences (id)
+        WHERE embedding_next_model IS NULL
+    """)
+
+    cur.close()
+    conn.close()
+    print(f"✅ Backfill to {model} started. Now run `python backfill_embeddings.py run`.")
+
+
+def embed_rows(rows: list, model: str, rejected: dict) -> list:
+    """
+    Embed a batch, splitting it into single rows if Cohere rejects it so one bad
+    row doesn't hold back the rest. Returns (id, content, embedding) for the rows
+    that embedded and adds the ones Cohere refused to `rejected`. Other errors
+    (outages, rate limits) are raised for the caller to back off on.
+    """
+    try:
+        embeddings = get_embeddings_batch([row[1] for row in rows], model=model)
+        return [(experience_id, content, embedding) for (experience_id, content), embedding in zip(rows, embeddings)]
+    except Exception as e:
+        if not is_rejection(e):
+            raise
+        if len(rows) == 1:
+            rejected[rows[0][0]] = str(e)
+            return []
+
+    embedded = []
+    for row in rows:
+        embedded.extend(embed_rows([row], model, rejected))
+    return embedded
+
+
+def run(batch_size: int, batches_per_minute: float):
+    conn = get_db()
+    cur = conn.cursor()
+    model = get_backfilling_model(cur)
+    conn.commit()
+
+    interval = 60.0 / batches_per_minute if batches_per_minute > 0 else 0
+    total = 0
+    # Rows Cohere refused, skipped for the rest of this run
+    rejected = {}
+
+    # Keep sweeping until a full pass finds nothing: rows edited behind the
+    # cursor are cleared by the trigger and picked up on the next pass.
+    while True:
+        last_id = ""
+        seen = 0
+
+        while True:
+            started = time.monotonic()
+            cur.execute("""
+                SELECT id, content
+                FROM experiences
+                WHERE embedding_next_model IS NULL AND id > %s AND NOT (id = ANY(%s))
+                ORDER BY id
+                LIMIT %s
+            """, (last_id, list(rejected), batch_size))
+            rows = cur.fetchall()
+            conn.commit()
+
+            if not rows:
+                break
+            seen += len(rows)
+
+            try:
+                embedded = embed_rows(rows, model, rejected)
+            except Exception as e:
+                print(f"⚠️  Embedding failed ({e}), retrying in {ERROR_BACKOFF}s")
+                time.sleep(ERROR_BACKOFF)
+                continue
+
+            for experience_id, content, embedding in embedded:
+                cur.execute("""
+                    UPDATE experiences
+                    SET embedding_next = %s, embedding_next_model = %s
+                    WHERE id = %s AND content = %s
+                """, (embedding, model, experience_id, content))
+                total += cur.rowcount
+            conn.commit()
+
+            last_id = rows[-1][0]
+            print(f"Re-embedded {total} rows (last id {last_id})")
+
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+        if seen == 0:
+            break
+
+    cur.close()
+    conn.close()
+
+    if rejected:
+        for experience_id, error in rejected.items():
+            print(f"⚠️  Cohere rejected {experience_id}: {error}")
+        print(f"⚠️  {len(rejected)} rows could not be embedded with {model}. Run "
+              f"`python backfill_embeddings.py cutover --allow-missing {len(rejected)}` to switch anyway; "
+              "the embedding worker retries them after the switch.")
+        return
+    print(f"✅ All rows embedded with {model}. Run `python backfill_embeddings.py cutover` to switch search over.")
+
+
+def cutover(allow_missing: int):
+    conn = get_db()
+    cur = conn.cursor()
+    model = get_backfilling_model(cur)
+    conn.commit()
+
+    # Build the vector index for the new column online, before taking any lock
+    conn.autocommit = True
+    cur.execute(f"""
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(model)}
+        ON experiences USING hnsw (embedding_next vector_cosine_ops)
+    """)
+    conn.autocommit = False
+
+    try:
+        cur.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+
+        # Flip the model first: this waits for in-flight searches holding the
+        # active row FOR SHARE, and new searches block here until we commit.
+        cur.execute("UPDATE embedding_models SET state = 'retired' WHERE state = 'active'")
+        cur.execute("""
+            UPDATE embedding_models SET state = 'active', activated_at = now()
+            WHERE model = %s
+        """, (model,))
+
+        cur.execute("LOCK TABLE experiences IN ACCESS EXCLUSIVE MODE")
+        cur.execute("SELECT count(*) FROM experiences WHERE embedding_next_model IS NULL")
+        missing = cur.fetchone()[0]
+        if missing > allow_missing:
+            conn.rollback()
+            sys.exit(f"{missing} rows are not re-embedded yet. Run `python backfill_embeddings.py run` again.")
+
+        cur.execute("DROP TRIGGER experiences_invalidate_embedding_next ON experiences")
+        cur.execute("DROP FUNCTION experiences_invalidate_embedding_next()")
+        cur.execute("DROP INDEX experiences_embedding_next_todo_idx")
+        cur.execute("ALTER TABLE experiences RENAME COLUMN embedding TO embedding_prev")
+        cur.execute("ALTER TABLE experiences RENAME COLUMN embedding_model TO embedding_model_prev")
+        cur.execute("ALTER TABLE experiences RENAME COLUMN embedding_next TO embedding")
+        cur.execute("ALTER TABLE experiences RENAME COLUMN embedding_next_model TO embedding_model")
+        # Rows without a new vector go back to the embedding worker
+        cur.execute("""
+            UPDATE experiences
+            SET embedding_status = 'pending', embedding_attempts = 0
+            WHERE embedding_model IS NULL
+        """)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    print(f"✅ Search now serves {model}. Previous vectors are kept in embedding_prev.")
+
+
+def drop_previous():
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+    cur.execute("""
+        ALTER TABLE experiences
+            DROP COLUMN IF EXISTS embedding_prev,
+            DROP COLUMN IF EXISTS embedding_model_prev
+    """)
+    conn.commit()
+    cur.close()
+    conn.close()
+    print("✅ Previous embeddings dropped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start_parser = commands.add_parser("start", help="prepare shadow columns for a new model")
+    start_parser.add_argument("model", choices=sorted(EMBEDDING_MODELS))
+
+    run_parser = commands.add_parser("run", help="re-embed rows into the shadow column")
+    run_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    run_parser.add_argument("--batches-per-minute", type=float, default=60,
+                            help="throttle; 0 disables it")
+
+    cutover_parser = commands.add_parser("cutover", help="atomically switch search to the new model")
+    cutover_parser.add_argument("--allow-missing", type=int, default=0,
+                                help="switch even if this many rows have no new vector (e.g. rejected by Cohere); "
+                                     "they are queued for the embedding worker")
+    commands.add_parser("drop-previous", help="drop vectors kept from the last cutover")
+
+    args = parser.parse_args()
+    if args.command == "start":
+        start(args.model)
+    elif args.command == "run":
+        run(args.batch_size, args.batches_per_minute)
+    elif args.command == "cutover":
+        cutover(args.allow_missing)
+    else:
+        drop_previous()
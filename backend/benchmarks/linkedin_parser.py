@@ -0,0 +1,101 @@
+"""
+Accuracy and latency benchmark for the rule-based LinkedIn parser.
+
+    python -m benchmarks.linkedin_parser
+
+Runs every profile in linkedin_corpus.json through utils.linkedin_parser and
+checks each expected entry: title and date range must match exactly, expected
+skills must all be found and "skills_excluded" must not be, and entries marked
+"llm" must fall below the confidence threshold so they are routed to the LLM.
+Also times parse_profile per profile. Exits non-zero if accuracy or p95 latency miss their targets.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from utils.linkedin_parser import CONFIDENCE_THRESHOLD, parse_profile
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "linkedin_corpus.json")
+
+
+def parse_case(case: dict) -> list:
+    return parse_profile(case.get("experiences_text"), case.get("projects_text"), case.get("volunteering_text"))
+
+
+def check_case(case: dict) -> list:
+    """Return a list of human-readable failures for one corpus profile."""
+    entries = parse_case(case)
+    failures = []
+
+    if len(entries) != len(case["expected"]):
+        return [f"expected {len(case['expected'])} entries, parsed {len(entries)}"]
+
+    for n, (expected, entry) in enumerate(zip(case["expected"], entries)):
+        routed = entry["confidence"] < CONFIDENCE_THRESHOLD
+        if expected.get("llm"):
+            if not routed:
+                failures.append(f"entry {n}: expected LLM fallback, got confidence {entry['confidence']}")
+            continue
+
+        if routed:
+            failures.append(f"entry {n}: unexpectedly sent to the LLM (confidence {entry['confidence']})")
+        for field in ("type", "title", "date_range"):
+            if entry[field] != expected[field]:
+                failures.append(f"entry {n}: {field} {entry[field]!r} != {expected[field]!r}")
+        missing = set(expected["skills"]) - set(entry["skills"])
+        if missing:
+            failures.append(f"entry {n}: missing skills {sorted(missing)}")
+        unexpected = set(expected.get("skills_excluded", [])) & set(entry["skills"])
+        if unexpected:
+            failures.append(f"entry {n}: unexpected skills {sorted(unexpected)}")
+
+    return failures
+
+
+def time_case(case: dict, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        parse_case(case)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--min-accuracy", type=float, default=1.0)
+    parser.add_argument("--max-p95-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+
+    passed = 0
+    timings = []
+    print(f"{'profile':<58} {'p50 ms':>8}  result")
+    for case in corpus:
+        failures = check_case(case)
+        case_timings = time_case(case, args.iterations)
+        timings.extend(case_timings)
+
+        passed += not failures
+        print(f"{case['name']:<58} {statistics.median(case_timings):>8.3f}  {'ok' if not failures else 'FAIL'}")
+        for failure in failures:
+            print(f"    {failure}")
+
+    accuracy = passed / len(corpus)
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(f"\nAccuracy: {passed}/{len(corpus)} profiles ({accuracy:.0%})")
+    print(f"Latency: p50 {statistics.median(timings):.3f} ms, p95 {p95:.3f} ms per profile")
+
+    if accuracy < args.min_accuracy or p95 > args.max_p95_ms:
+        sys.exit("\n❌ LinkedIn parser benchmark below target")
+    print("\n✅ LinkedIn parser benchmark passed")
+
+
+if __name__ == "__main__":
+    main()
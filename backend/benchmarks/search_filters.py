@@ -0,0 +1,237 @@
+"""
+Benchmark for filtered vector search.
+
+    python -m benchmarks.search_filters --rows 200000 --users 2000
+
+Copies the experiences table definition and its indexes into a scratch schema,
+seeds synthetic rows, then runs the exact query /api/search builds for a set of
+filter combinations. For each scenario it prints latency percentiles, recall
+against an exact brute-force ranking of the same rows, and the plan nodes that
+touched the table. Exits non-zero if any scenario lost results (recall < 100%)
+or, with realistic data (--users >= 20), fell back to a sequential scan.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+from dotenv import load_dotenv
+load_dotenv()  # Load .env before other imports
+
+from psycopg2.extras import execute_values
+
+from database import get_db
+from models import SearchRequest
+from routes.search import build_filters, build_search_query
+from utils.embeddings import EMBEDDING_MODELS, get_active_model
+
+SCHEMA = "bench_search"
+# Below this many users a single user's rows are >5% of the table and a
+# sequential scan is a legitimate plan, so it's reported but not a failure
+MIN_USERS_FOR_INDEX_CHECK = 20
+
+TYPES = ["work", "project", "volunteering"]
+SKILLS = [
+    "Python", "JavaScript", "TypeScript", "React", "Node.js", "SQL", "PostgreSQL", "Docker",
+    "Kubernetes", "AWS", "GCP", "Go", "Rust", "Java", "C++", "FastAPI", "Django", "Flask",
+    "Pandas", "PyTorch", "TensorFlow", "Redis", "Kafka", "GraphQL", "Terraform", "Linux",
+]
+INDUSTRIES = ["Fintech", "Healthcare", "E-commerce", "Education", "Gaming", "Logistics", "Government"]
+TAGS = ["backend", "frontend", "ml", "infra", "data", "mobile", "leadership", "research"]
+
+SCENARIOS = {
+    "no filters": {},
+    "type": {"type": "work"},
+    "common skill": {"skills": ["Python"]},
+    "two skills": {"skills": ["Python", "Docker"]},
+    "industry": {"industry": ["Fintech"]},
+    "tag": {"tags": ["ml"]},
+    "since 2021": {"date_from": date(2021, 1, 1)},
+    "date window": {"date_from": date(2019, 1, 1), "date_to": date(2020, 12, 31)},
+    "work + Python since 2021": {"type": "work", "skills": ["Python"], "date_from": date(2021, 1, 1)},
+}
+
+
+def random_vector(dimensions: int) -> list:
+    vector = [random.gauss(0, 1) for _ in range(dimensions)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+
+def random_dates() -> tuple:
+    start = date(random.randint(2015, 2025), random.randint(1, 12), 1)
+    if random.random() < 0.2:
+        return start, None
+    end_year = min(start.year + random.randint(0, 3), 2025)
+    end = date(end_year, random.randint(start.month if end_year == start.year else 1, 12), 28)
+    return start, end
+
+
+def create_scratch_table(cur):
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    cur.execute(f"""
+        CREATE TABLE {SCHEMA}.experiences
+        (LIKE public.experiences INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+    """)
+
+
+def copy_indexes(cur):
+    """Recreate the production indexes on the scratch table (after loading, which is faster)."""
+    cur.execute("""
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = 'public' AND tablename = 'experiences'
+    """)
+    for name, definition in cur.fetchall():
+        definition = definition.replace(" ON public.experiences ", f" ON {SCHEMA}.experiences ")
+        definition = definition.replace(f"INDEX {name} ", f"INDEX {SCHEMA}_{name} ", 1)
+        cur.execute(definition)
+
+
+def seed(cur, rows: int, users: int, model: str):
+    dimensions = EMBEDDING_MODELS[model]
+    user_ids = [f"bench-user-{i}" for i in range(users)]
+
+    batch = []
+    for i in range(rows):
+        start_date, end_date = random_dates()
+        batch.append((
+            f"bench-{i}",
+            user_ids[i % users],
+            random.choice(TYPES),
+            f"Synthetic experience {i}",
+            random.sample(SKILLS, random.randint(3, 8)),
+            random.sample(INDUSTRIES, random.randint(1, 2)),
+            random.sample(TAGS, random.randint(0, 3)),
+            "Synthetic benchmark content",
+            start_date,
+            end_date,
+            random_vector(dimensions),
+            "ready",
+            model,
+        ))
+
+        if len(batch) == 1000 or i == rows - 1:
+            execute_values(cur, f"""
+                INSERT INTO {SCHEMA}.experiences
+                (id, user_id, type, title, skills, industry, tags, content,
+                 start_date, end_date, embedding, embedding_status, embedding_model)
+                VALUES %s
+            """, batch)
+            batch = []
+
+    return user_ids
+
+
+def plan_scans(plan: dict) -> list:
+    """Return (node type, index name) for every plan node that reads the experiences table."""
+    scans = []
+    if plan.get("Relation Name") == "experiences" or "Index Name" in plan:
+        scans.append((plan["Node Type"], plan.get("Index Name")))
+    for child in plan.get("Plans", []):
+        scans.extend(plan_scans(child))
+    return scans
+
+
+def exact_ids(cur, body: SearchRequest, user_id: str, model: str, query_embedding: list) -> list:
+    """Reference top 3 for the same filters, ranked by brute force with index scans disabled."""
+    clauses, params = build_filters(body)
+    where = " AND ".join(["user_id = %s", "embedding_status = 'ready'", "embedding_model = %s", *clauses])
+
+    cur.execute("SET enable_indexscan = off")
+    cur.execute("SET enable_bitmapscan = off")
+    try:
+        cur.execute(f"""
+            SELECT id FROM experiences
+            WHERE {where}
+            ORDER BY embedding <=> %s::vector
+            LIMIT 3
+        """, (user_id, model, *params, query_embedding))
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.execute("RESET enable_indexscan")
+        cur.execute("RESET enable_bitmapscan")
+
+
+def run_scenario(cur, filters: dict, user_ids: list, model: str, iterations: int) -> tuple:
+    dimensions = EMBEDDING_MODELS[model]
+    body = SearchRequest(query="benchmark", **filters)
+
+    sql, params = build_search_query(body, random.choice(user_ids), model, random_vector(dimensions))
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+    scans = plan_scans(cur.fetchone()[0][0]["Plan"])
+
+    timings = []
+    found = expected = 0
+    for _ in range(iterations):
+        user_id, query_embedding = random.choice(user_ids), random_vector(dimensions)
+        sql, params = build_search_query(body, user_id, model, query_embedding)
+        started = time.perf_counter()
+        cur.execute(sql, params)
+        ids = [row[0] for row in cur.fetchall()]
+        timings.append((time.perf_counter() - started) * 1000)
+
+        exact = exact_ids(cur, body, user_id, model, query_embedding)
+        found += len(set(ids) & set(exact))
+        expected += len(exact)
+
+    recall = found / expected if expected else 1.0
+    return scans, timings, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    random.seed(0)
+    conn = get_db()
+    cur = conn.cursor()
+    model = get_active_model(cur)
+
+    try:
+        print(f"Seeding {args.rows} rows for {args.users} users...")
+        create_scratch_table(cur)
+        user_ids = seed(cur, args.rows, args.users, model)
+        copy_indexes(cur)
+        cur.execute(f"ANALYZE {SCHEMA}.experiences")
+        conn.commit()
+
+        # Same SQL as the route, resolved against the scratch table
+        cur.execute(f"SET search_path TO {SCHEMA}, public")
+
+        failed = False
+        print(f"\n{'scenario':<28} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}  plan")
+        for name, filters in SCENARIOS.items():
+            scans, timings, recall = run_scenario(cur, filters, user_ids, model, args.iterations)
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+            plan = ", ".join(f"{node} ({index})" if index else node for node, index in scans)
+
+            if recall < 1.0:
+                failed = True
+                plan += "  <-- missing results"
+            if any(node == "Seq Scan" for node, _ in scans):
+                # When each user owns a sizeable share of the table, scanning it is the right plan
+                failed = failed or args.users >= MIN_USERS_FOR_INDEX_CHECK
+                plan += "  <-- sequential scan"
+            print(f"{name:<28} {statistics.median(timings):>8.2f} {p95:>8.2f} {recall:>7.0%}  {plan}")
+    finally:
+        conn.rollback()
+        if not args.keep:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            conn.commit()
+        cur.close()
+        conn.close()
+
+    if failed:
+        sys.exit("\n❌ At least one filtered query lost results or used a sequential scan")
+    print("\n✅ All filtered queries return exact results and are index-driven")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import os
 import psycopg2
+import psycopg2.extensions
 from pgvector.psycopg2 import register_vector
+from utils.profiling import span
 
 # Use Supabase connection string from dashboard:
 # Settings → Database → Connection string → URI
@@ -8,11 +10,30 @@ from pgvector.psycopg2 import register_vector
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 
+class ProfiledCursor(psycopg2.extensions.cursor):
+    """Cursor that records each query as a span when the request is being profiled."""
+
+    def execute(self, query, vars=None):
+        with span("db", _query_name(query)):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with span("db", _query_name(query)):
+            return super().executemany(query, vars_list)
+
+
+def _query_name(query) -> str:
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    return " ".join(str(query).split())[:120]
+
+
 def get_db():
     """Get a database connection with pgvector registered."""
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL environment variable not set")
 
-    conn = psycopg2.connect(DATABASE_URL)
-    register_vector(conn)
+    with span("db", "connect"):
+        conn = psycopg2.connect(DATABASE_URL, cursor_factory=ProfiledCursor)
+        register_vector(conn)
     return conn
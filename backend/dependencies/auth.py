@@ -4,6 +4,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError, ExpiredSignatureError, jwk
 from functools import lru_cache
+from utils.profiling import span
 
 security = HTTPBearer()
 
@@ -57,14 +58,15 @@ def get_current_user(
 
     try:
         # Get public key and verify token
-        public_key = get_public_key(token)
-
-        payload = jwt.decode(
-            token,
-            public_key,
-            algorithms=["ES256"],
-            audience="authenticated",
-        )
+        with span("auth", "verify_jwt"):
+            public_key = get_public_key(token)
+
+            payload = jwt.decode(
+                token,
+                public_key,
+                algorithms=["ES256"],
+                audience="authenticated",
+            )
 
         user_id: str = payload.get("sub")
         if not user_id:
@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()  # Load .env before other imports
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -8,10 +9,22 @@ from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from routes import experiences, search, generate, linkedin
+from utils import embedding_worker, tailoring_jobs
+from utils.profiling import ProfilingMiddleware
 
 limiter = Limiter(key_func=get_remote_address)
 
-app = FastAPI(title="Resume Tailor API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    embedding_worker.start()
+    tailoring_jobs.resume_unfinished()
+    yield
+    embedding_worker.stop()
+    tailoring_jobs.shutdown()
+
+
+app = FastAPI(title="Resume Tailor API", lifespan=lifespan)
 app.state.limiter = limiter
 
 
@@ -22,6 +35,9 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
         content={"detail": "Too many requests. Please wait a moment and try again."},
     )
 
+# Opt-in per-request profiling; see utils/profiling.py
+app.add_middleware(ProfilingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -32,7 +48,8 @@ app.add_middleware(
     allow_origin_regex=r"https://tailorcvai-[a-z0-9]+-bhavya-goels-projects\.vercel\.app",
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "HEAD"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "X-Profile-Token"],
+    expose_headers=["X-Profile-Id"],
 )
 
 # Mount routers
@@ -0,0 +1,72 @@
+"""
+Apply the SQL files in migrations/ in order.
+
+    python migrate.py
+
+Applied files are recorded in schema_migrations, so running this again only
+applies new ones. Every migration is also safe to re-run, so databases that
+were migrated by hand can run this once to get recorded. Each file runs in
+its own transaction. After 004 (date columns) is applied, existing rows get
+their start_date/end_date filled in by backfill_dates.py.
+"""
+import os
+import sys
+
+import psycopg2
+
+from dotenv import load_dotenv
+load_dotenv()  # Load .env before other imports
+
+from database import DATABASE_URL
+import backfill_dates
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+DATE_COLUMNS_MIGRATION = "004_search_filters.sql"
+
+
+def main():
+    if not DATABASE_URL:
+        sys.exit("DATABASE_URL environment variable not set")
+
+    # Plain connection: pgvector may not be installed until the first migration runs
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    conn.commit()
+
+    cur.execute("SELECT name FROM schema_migrations")
+    applied = {row[0] for row in cur.fetchall()}
+    pending = sorted(name for name in os.listdir(MIGRATIONS_DIR) if name.endswith(".sql") and name not in applied)
+
+    if not pending:
+        print("✅ Database is up to date")
+
+    for name in pending:
+        with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+            sql = f.read()
+        try:
+            cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            sys.exit(f"❌ {name} failed: {e}")
+        print(f"✅ Applied {name}")
+
+        if name == DATE_COLUMNS_MIGRATION:
+            backfill_dates.main()
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
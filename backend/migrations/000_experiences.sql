@@ -0,0 +1,19 @@
+-- Base experiences table, for fresh databases. Existing deployments already
+-- have it; every later migration alters it in place.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS experiences (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    date_range TEXT,
+    skills TEXT[],
+    industry TEXT[],
+    tags TEXT[],
+    content TEXT NOT NULL,
+    embedding vector(384) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS experiences_user_idx ON experiences (user_id);
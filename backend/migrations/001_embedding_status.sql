@@ -0,0 +1,16 @@
+-- Write-behind embeddings: rows are committed with embedding_status = 'pending'
+-- and the background worker (utils/embedding_worker.py) fills in the vector.
+
+ALTER TABLE experiences ALTER COLUMN embedding DROP NOT NULL;
+
+ALTER TABLE experiences
+    ADD COLUMN IF NOT EXISTS embedding_status TEXT NOT NULL DEFAULT 'ready'
+    CHECK (embedding_status IN ('pending', 'ready'));
+
+-- New rows start pending; existing rows already have a vector
+ALTER TABLE experiences ALTER COLUMN embedding_status SET DEFAULT 'pending';
+
+-- Keeps the worker's pending scan cheap once the backlog is drained
+CREATE INDEX IF NOT EXISTS experiences_embedding_pending_idx
+    ON experiences (id)
+    WHERE embedding_status = 'pending';
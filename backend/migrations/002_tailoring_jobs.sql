@@ -0,0 +1,34 @@
+-- Batch tailoring jobs: many job descriptions x experience ids, processed by
+-- the worker pool in utils/tailoring_jobs.py.
+
+CREATE TABLE IF NOT EXISTS tailoring_jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    job_descriptions TEXT[] NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'completed')),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    completed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS tailoring_jobs_user_idx ON tailoring_jobs (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS tailoring_jobs_unfinished_idx
+    ON tailoring_jobs (created_at)
+    WHERE status <> 'completed';
+
+CREATE TABLE IF NOT EXISTS tailoring_job_items (
+    job_id TEXT NOT NULL REFERENCES tailoring_jobs (id) ON DELETE CASCADE,
+    jd_index INTEGER NOT NULL,
+    -- Identical job descriptions in one batch share a single LLM call per experience
+    jd_hash TEXT NOT NULL,
+    experience_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    bullets JSONB,
+    error TEXT,
+    finished_at TIMESTAMPTZ,
+    PRIMARY KEY (job_id, jd_index, experience_id)
+);
+
+CREATE INDEX IF NOT EXISTS tailoring_job_items_work_idx
+    ON tailoring_job_items (job_id, jd_hash, experience_id);
@@ -0,0 +1,27 @@
+-- Embedding model versioning. experiences.embedding_model records which model
+-- produced each stored vector, and embedding_models tracks which model search
+-- serves from. Re-embedding into a new model is done online by
+-- backfill_embeddings.py.
+
+CREATE TABLE IF NOT EXISTS embedding_models (
+    model TEXT PRIMARY KEY,
+    dimensions INTEGER NOT NULL,
+    state TEXT NOT NULL CHECK (state IN ('active', 'backfilling', 'retired')),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    activated_at TIMESTAMPTZ
+);
+
+-- At most one model serves search at a time
+CREATE UNIQUE INDEX IF NOT EXISTS embedding_models_one_active_idx
+    ON embedding_models (state)
+    WHERE state = 'active';
+
+INSERT INTO embedding_models (model, dimensions, state, activated_at)
+VALUES ('embed-english-light-v3.0', 384, 'active', now())
+ON CONFLICT (model) DO NOTHING;
+
+ALTER TABLE experiences ADD COLUMN IF NOT EXISTS embedding_model TEXT;
+
+UPDATE experiences
+SET embedding_model = 'embed-english-light-v3.0'
+WHERE embedding IS NOT NULL AND embedding_model IS NULL;
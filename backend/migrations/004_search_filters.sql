@@ -0,0 +1,14 @@
+-- Structured search filters. Array filters use containment (@>) against GIN
+-- indexes; date filters use start_date/end_date parsed from date_range
+-- (end_date NULL = ongoing). Run backfill_dates.py once to populate existing rows.
+
+ALTER TABLE experiences
+    ADD COLUMN IF NOT EXISTS start_date DATE,
+    ADD COLUMN IF NOT EXISTS end_date DATE;
+
+CREATE INDEX IF NOT EXISTS experiences_skills_idx ON experiences USING gin (skills);
+CREATE INDEX IF NOT EXISTS experiences_industry_idx ON experiences USING gin (industry);
+CREATE INDEX IF NOT EXISTS experiences_tags_idx ON experiences USING gin (tags);
+
+CREATE INDEX IF NOT EXISTS experiences_user_type_idx ON experiences (user_id, type);
+CREATE INDEX IF NOT EXISTS experiences_user_dates_idx ON experiences (user_id, start_date, end_date);
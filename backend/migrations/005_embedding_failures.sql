@@ -0,0 +1,12 @@
+-- Per-row embedding failures. The worker counts attempts on rows Cohere rejects
+-- and parks them as 'failed' after EMBED_MAX_ATTEMPTS (default 5), so one bad row can't
+-- block the pending queue. Editing the content, or restarting the worker,
+-- resets the row to 'pending'.
+
+ALTER TABLE experiences
+    ADD COLUMN IF NOT EXISTS embedding_attempts INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE experiences DROP CONSTRAINT IF EXISTS experiences_embedding_status_check;
+ALTER TABLE experiences
+    ADD CONSTRAINT experiences_embedding_status_check
+    CHECK (embedding_status IN ('pending', 'ready', 'failed'));
@@ -1,10 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from datetime import date
+from typing import Annotated, List, Optional
 
 
 class SearchRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=5000)
     limit: int = Field(default=5, ge=1, le=20)
+    # Structured filters, applied in the same SQL as the vector ranking
+    type: Optional[str] = Field(default=None, max_length=50)
+    skills: List[str] = Field(default=[], max_length=30)
+    industry: List[str] = Field(default=[], max_length=10)
+    tags: List[str] = Field(default=[], max_length=20)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
 
 
 class ProjectData(BaseModel):
@@ -32,3 +40,8 @@ class LinkedInParseRequest(BaseModel):
 
 class BatchExperienceRequest(BaseModel):
     experiences: List[ProjectData] = Field(..., max_length=25)
+
+
+class TailoringJobRequest(BaseModel):
+    job_descriptions: List[Annotated[str, Field(min_length=10, max_length=5000)]] = Field(..., min_length=1, max_length=50)
+    experience_ids: List[str] = Field(..., min_length=1, max_length=20)
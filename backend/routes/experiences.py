@@ -1,14 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
 from models import ProjectData, BatchExperienceRequest
 from database import get_db
-from utils.embeddings import get_embedding, get_embeddings_batch
+from utils import embedding_worker
+from utils.dates import parse_date_range
 from dependencies.auth import get_current_user
+from utils.profiling import ProfiledRoute
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 limiter = Limiter(key_func=get_remote_address)
 
-router = APIRouter(prefix="/api", tags=["experiences"])
+router = APIRouter(prefix="/api", tags=["experiences"], route_class=ProfiledRoute)
 
 
 @router.post("/experiences")
@@ -18,28 +20,29 @@ def add_experience(
     request: Request,
     user_id: str = Depends(get_current_user),
 ):
-    embedding = get_embedding(project.content)
     conn = get_db()
     cur = conn.cursor()
 
     try:
+        # Embedding is filled in by the background worker
         cur.execute("""
-        INSERT INTO experiences (id, user_id, type, title, date_range, skills, industry, tags, content, embedding)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        INSERT INTO experiences (id, user_id, type, title, date_range, start_date, end_date, skills, industry, tags, content, embedding_status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending')
         """, (
             project.id,
             user_id,
             project.type,
             project.title,
             project.date_range,
+            *parse_date_range(project.date_range),
             project.skills,
             project.industry,
             project.tags,
-            project.content,
-            embedding
+            project.content
         ))
         conn.commit()
-        return {"status": "success", "id": project.id}
+        embedding_worker.notify()
+        return {"status": "success", "id": project.id, "embedding_status": "pending"}
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail="An error occurred while processing your request")
@@ -58,31 +61,29 @@ def add_experiences_batch(
     if not body.experiences:
         raise HTTPException(status_code=400, detail="No experiences provided")
 
-    texts = [exp.content for exp in body.experiences]
-    embeddings = get_embeddings_batch(texts)
-
     conn = get_db()
     cur = conn.cursor()
 
     try:
-        for exp, embedding in zip(body.experiences, embeddings):
+        for exp in body.experiences:
             cur.execute("""
-            INSERT INTO experiences (id, user_id, type, title, date_range, skills, industry, tags, content, embedding)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO experiences (id, user_id, type, title, date_range, start_date, end_date, skills, industry, tags, content, embedding_status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending')
             """, (
                 exp.id,
                 user_id,
                 exp.type,
                 exp.title,
                 exp.date_range,
+                *parse_date_range(exp.date_range),
                 exp.skills,
                 exp.industry,
                 exp.tags,
-                exp.content,
-                embedding
+                exp.content
             ))
         conn.commit()
-        return {"status": "success", "count": len(body.experiences)}
+        embedding_worker.notify()
+        return {"status": "success", "count": len(body.experiences), "embedding_status": "pending"}
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail="An error occurred while processing your request")
@@ -97,7 +98,7 @@ def get_all_experiences(user_id: str = Depends(get_current_user)):
     cur = conn.cursor()
 
     cur.execute("""
-         SELECT id, type, title, date_range, skills, industry, tags, content
+         SELECT id, type, title, date_range, skills, industry, tags, content, embedding_status
          FROM experiences
          WHERE user_id = %s
          ORDER BY date_range DESC
@@ -113,7 +114,8 @@ def get_all_experiences(user_id: str = Depends(get_current_user)):
             "skills": row[4],
             "industry": row[5],
             "tags": row[6],
-            "content": row[7]
+            "content": row[7],
+            "embedding_status": row[8]
         })
 
     cur.close()
@@ -130,34 +132,45 @@ def update_experience(
     request: Request,
     user_id: str = Depends(get_current_user),
 ):
-    embedding = get_embedding(project.content)
     conn = get_db()
     cur = conn.cursor()
 
     try:
+        # Only invalidate the embedding when the content actually changed;
+        # right-hand sides see the row's old values.
         cur.execute("""
             UPDATE experiences
-            SET type = %s, title = %s, date_range = %s, skills = %s,
-                industry = %s, tags = %s, content = %s, embedding = %s
+            SET type = %s, title = %s, date_range = %s, start_date = %s, end_date = %s,
+                skills = %s, industry = %s, tags = %s, content = %s,
+                embedding = CASE WHEN content = %s THEN embedding ELSE NULL END,
+                embedding_status = CASE WHEN content = %s THEN embedding_status ELSE 'pending' END,
+                embedding_attempts = CASE WHEN content = %s THEN embedding_attempts ELSE 0 END
             WHERE id = %s AND user_id = %s
+            RETURNING embedding_status
         """, (
             project.type,
             project.title,
             project.date_range,
+            *parse_date_range(project.date_range),
             project.skills,
             project.industry,
             project.tags,
             project.content,
-            embedding,
+            project.content,
+            project.content,
+            project.content,
             experience_id,
             user_id
         ))
 
-        if cur.rowcount == 0:
+        row = cur.fetchone()
+        if row is None:
             raise HTTPException(status_code=404, detail="Experience not found")
 
         conn.commit()
-        return {"status": "updated", "id": experience_id}
+        if row[0] == "pending":
+            embedding_worker.notify()
+        return {"status": "updated", "id": experience_id, "embedding_status": row[0]}
     except HTTPException:
         raise
     except Exception as e:
@@ -2,32 +2,31 @@ import json
 from fastapi import APIRouter, HTTPException, Depends, Request
 from models import LinkedInParseRequest
 from utils.llm import call_llm
+from utils.linkedin_parser import CONFIDENCE_THRESHOLD, parse_profile
 from dependencies.auth import get_current_user
+from utils.profiling import ProfiledRoute
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 limiter = Limiter(key_func=get_remote_address)
 
-router = APIRouter(prefix="/api", tags=["linkedin"])
+router = APIRouter(prefix="/api", tags=["linkedin"], route_class=ProfiledRoute)
 
+SECTION_HEADINGS = {
+    "work": "WORK EXPERIENCE",
+    "project": "PROJECTS",
+    "volunteering": "VOLUNTEERING",
+}
+SECTION_ORDER = list(SECTION_HEADINGS)
 
-@router.post("/parse-linkedin")
-@limiter.limit("5/minute")
-def parse_linkedin(
-    body: LinkedInParseRequest,
-    request: Request,
-    user_id: str = Depends(get_current_user),
-):
+
+def parse_with_llm(entries: list) -> list:
+    """Ask the LLM to extract experiences from the raw text of entries the rule-based parser wasn't sure about."""
     sections = []
-    if body.experiences_text and body.experiences_text.strip():
-        sections.append(f"=== WORK EXPERIENCE ===\n{body.experiences_text.strip()}")
-    if body.projects_text and body.projects_text.strip():
-        sections.append(f"=== PROJECTS ===\n{body.projects_text.strip()}")
-    if body.volunteering_text and body.volunteering_text.strip():
-        sections.append(f"=== VOLUNTEERING ===\n{body.volunteering_text.strip()}")
-
-    if not sections:
-        raise HTTPException(status_code=400, detail="Please paste text in at least one section.")
+    for entry_type, heading in SECTION_HEADINGS.items():
+        raw = [entry["raw"] for entry in entries if entry["type"] == entry_type]
+        if raw:
+            sections.append(f"=== {heading} ===\n" + "\n\n".join(raw))
 
     combined_text = "\n\n".join(sections)
 
@@ -55,7 +54,7 @@ Rules:
 
 Return ONLY the JSON array:"""
 
-    llm_output = call_llm(prompt, temperature=0.1)
+    llm_output = call_llm(prompt, task="extract", temperature=0.1)
 
     # Parse the JSON response
     try:
@@ -87,4 +86,56 @@ Return ONLY the JSON array:"""
             "content": entry.get("content", ""),
         })
 
+    return experiences
+
+
+def _rule_based_result(entry: dict) -> dict:
+    return {
+        "type": entry["type"],
+        "title": entry["title"],
+        "date_range": entry["date_range"],
+        "skills": entry["skills"],
+        "content": entry["content"],
+        "confidence": entry["confidence"],
+        "source": "rules",
+    }
+
+
+@router.post("/parse-linkedin")
+@limiter.limit("5/minute")
+def parse_linkedin(
+    body: LinkedInParseRequest,
+    request: Request,
+    user_id: str = Depends(get_current_user),
+):
+    entries = parse_profile(body.experiences_text, body.projects_text, body.volunteering_text)
+
+    if not entries:
+        raise HTTPException(status_code=400, detail="Please paste text in at least one section.")
+
+    # Regular LinkedIn layouts parse deterministically; only unsure entries go to the LLM
+    confident = [entry for entry in entries if entry["confidence"] >= CONFIDENCE_THRESHOLD]
+    ambiguous = [entry for entry in entries if entry["confidence"] < CONFIDENCE_THRESHOLD]
+
+    experiences = [_rule_based_result(entry) for entry in confident]
+
+    if ambiguous:
+        try:
+            parsed = parse_with_llm(ambiguous)
+            for entry in parsed:
+                entry["confidence"] = None
+                entry["source"] = "llm"
+        except HTTPException:
+            # With nothing parsed, surface the LLM error as before; otherwise
+            # return our best guess for review rather than failing the import
+            if not confident:
+                raise
+            parsed = [_rule_based_result(entry) for entry in ambiguous]
+        experiences.extend(parsed)
+
+    # Keep the section order of the pasted text; LLM results join their section at the end
+    experiences.sort(
+        key=lambda entry: SECTION_ORDER.index(entry["type"]) if entry["type"] in SECTION_ORDER else len(SECTION_ORDER)
+    )
+
     return {"experiences": experiences, "count": len(experiences)}
@@ -1,16 +1,76 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models import SearchRequest
 from database import get_db
-from utils.embeddings import get_embedding
+from utils.embeddings import get_active_model, get_embedding
 from dependencies.auth import get_current_user
+from utils.profiling import ProfiledRoute
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 limiter = Limiter(key_func=get_remote_address)
 
-router = APIRouter(prefix="/api", tags=["search"])
+router = APIRouter(prefix="/api", tags=["search"], route_class=ProfiledRoute)
 
 SIMILARITY_THRESHOLD = 0
+# Re-embeds allowed when the active model changes mid-request
+MAX_MODEL_SWITCHES = 2
+
+
+def build_filters(body: SearchRequest) -> tuple:
+    """
+    Translate the structured filters on a search into SQL conditions and params.
+
+    Array filters use containment (@>) so they can be answered by the GIN indexes;
+    date filters use the parsed start_date/end_date columns, where a NULL end_date
+    means the experience is ongoing.
+    """
+    clauses, params = [], []
+
+    if body.type:
+        clauses.append("type = %s")
+        params.append(body.type)
+
+    for column in ("skills", "industry", "tags"):
+        values = getattr(body, column)
+        if values:
+            clauses.append(f"{column} @> %s::text[]")
+            params.append(values)
+
+    if body.date_from:
+        clauses.append("start_date IS NOT NULL AND (end_date IS NULL OR end_date >= %s)")
+        params.append(body.date_from)
+    if body.date_to:
+        clauses.append("start_date <= %s")
+        params.append(body.date_to)
+
+    return clauses, params
+
+
+def build_search_query(body: SearchRequest, user_id: str, model: str, query_embedding: list) -> tuple:
+    """
+    Build the filtered nearest-neighbour query used by /api/search.
+
+    The filters are applied first, through the btree/GIN indexes, and only the
+    matching rows are ranked by exact distance. The MATERIALIZED CTE keeps the
+    planner off the HNSW index: an approximate scan there only looks at
+    ef_search candidates across all users and filters them afterwards, which
+    silently drops matches. One user's filtered rows are few enough to rank exactly.
+    """
+    clauses, params = build_filters(body)
+    where = " AND ".join(["user_id = %s", "embedding_status = 'ready'", "embedding_model = %s", *clauses])
+
+    sql = f"""
+        WITH candidates AS MATERIALIZED (
+            SELECT id, type, title, date_range, content, skills, embedding
+            FROM experiences
+            WHERE {where}
+        )
+        SELECT id, type, title, date_range, content, skills
+        FROM candidates
+        ORDER BY embedding <=> %s::vector
+        LIMIT 3
+    """
+    return sql, (user_id, model, *params, query_embedding)
 
 
 @router.post("/search")
@@ -20,37 +80,66 @@ def search_experiences(
     request: Request,
     user_id: str = Depends(get_current_user),
 ):
-    query_embedding = get_embedding(body.query, input_type="search_query")
-
     conn = get_db()
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT id, type, title, date_range, content, skills
-        FROM experiences
-        WHERE user_id = %s
-        ORDER BY embedding <=> %s::vector
-        LIMIT 3
-    """, (user_id, query_embedding))
-
-    results = []
-    for row in cur.fetchall():
-        results.append({
-            "id": row[0],
-            "type": row[1],
-            "title": row[2],
-            "date_range": row[3],
-            "content": row[4],
-            "skills": row[5]
-        })
-
-    cur.close()
-    conn.close()
+    try:
+        # Embed the query with the model the stored vectors came from. Cohere is
+        # called outside any transaction; the model is then re-checked under a
+        # share lock that's held only for the queries, and the query re-embedded
+        # if a cutover switched models in between.
+        model = get_active_model(cur)
+        conn.commit()
+
+        for _ in range(MAX_MODEL_SWITCHES + 1):
+            query_embedding = get_embedding(body.query, input_type="search_query", model=model)
+            active = get_active_model(cur, lock=True)
+            if active == model:
+                break
+            conn.rollback()
+            model = active
+        else:
+            raise HTTPException(status_code=503, detail="Search is being upgraded, please try again shortly")
+
+        cur.execute(*build_search_query(body, user_id, model, query_embedding))
+
+        results = []
+        for row in cur.fetchall():
+            results.append({
+                "id": row[0],
+                "type": row[1],
+                "title": row[2],
+                "date_range": row[3],
+                "content": row[4],
+                "skills": row[5]
+            })
+
+        # Rows still waiting on the embedding worker can't be ranked yet
+        clauses, params = build_filters(body)
+        where = " AND ".join(["user_id = %s", "embedding_status = 'pending'", *clauses])
+        cur.execute(f"""
+            SELECT count(*)
+            FROM experiences
+            WHERE {where}
+        """, (user_id, *params))
+        pending = cur.fetchone()[0]
+
+        conn.commit()
+    except HTTPException:
+        conn.rollback()
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request")
+    finally:
+        cur.close()
+        conn.close()
 
     if not results:
         return {
             "results": [],
+            "pending": pending,
             "message": "No experiences found matching your query. Try broader search terms."
         }
 
-    return {"results": results}
+    return {"results": results, "pending": pending}
@@ -0,0 +1,154 @@
+import pytest
+from fastapi import HTTPException
+
+from utils import llm
+from utils.llm import BudgetExhausted, CallBudget, FakeBackend, LLMBackend, LLMRouter
+
+
+class ScriptedBackend(FakeBackend):
+    """FakeBackend with its own name, cost and prior, failing with the given status codes first."""
+
+    def __init__(self, name: str, cost: float, prior_latency: float, failures=()):
+        super().__init__({"generate": f"• from {name}", "extract": f"[\"{name}\"]"})
+        self.name = name
+        self.cost = cost
+        self.prior_latency = prior_latency
+        self.failures = list(failures)
+        self.calls = []
+
+    def complete(self, prompt, task, temperature, timeout):
+        self.calls.append(task)
+        if self.failures:
+            raise HTTPException(status_code=self.failures.pop(0), detail=f"{self.name} failed")
+        return super().complete(prompt, task, temperature, timeout)
+
+
+def make_router(groq_failures=(), ollama_failures=()):
+    groq = ScriptedBackend("groq", cost=1.0, prior_latency=1.0, failures=groq_failures)
+    ollama = ScriptedBackend("ollama", cost=0.0, prior_latency=8.0, failures=ollama_failures)
+    return LLMRouter([groq, ollama]), groq, ollama
+
+
+def names(backends):
+    return [backend.name for backend in backends]
+
+
+def test_backend_must_implement_complete():
+    with pytest.raises(TypeError):
+        LLMBackend()
+
+
+def test_generate_prefers_groq_within_budget():
+    router, groq, ollama = make_router()
+    # Ollama's 8s prior is over the 3s generate budget, so Groq goes first despite its cost
+    assert names(router.candidates("generate")) == ["groq", "ollama"]
+    assert router.complete("prompt", "generate", 0.3, 60) == "• from groq"
+    assert ollama.calls == []
+
+
+def test_extract_prefers_cheapest_within_budget():
+    router, groq, ollama = make_router()
+    # Both fit the 20s extract budget, so the free local model wins
+    assert names(router.candidates("extract")) == ["ollama", "groq"]
+    assert router.complete("prompt", "extract", 0.1, 60) == '["ollama"]'
+
+
+def test_fastest_first_when_nothing_is_within_budget():
+    router, groq, ollama = make_router()
+    for _ in range(20):
+        router.record(groq, "generate", 12.0)
+    # Groq now averages ~12s, Ollama is still at its 8s prior: both over budget, fastest first
+    assert names(router.candidates("generate")) == ["ollama", "groq"]
+    # Latency is tracked per task, so extract ordering is unaffected
+    assert names(router.candidates("extract")) == ["ollama", "groq"]
+
+
+def test_falls_back_on_rate_limit_and_cools_down_backend():
+    router, groq, ollama = make_router(groq_failures=[429])
+
+    assert router.complete("prompt", "generate", 0.3, 60) == "• from ollama"
+    assert groq.calls == ["generate"]
+
+    # Groq's rate limit is per account: it cools down for every task
+    assert names(router.candidates("generate")) == ["ollama", "groq"]
+    assert router.snapshot()["groq/generate"]["cooling_down"]
+
+    router.complete("prompt", "generate", 0.3, 60)
+    assert groq.calls == ["generate"]
+
+
+def test_rate_limit_on_one_task_cools_backend_for_others():
+    router, groq, ollama = make_router(ollama_failures=[429])
+
+    assert router.complete("prompt", "extract", 0.1, 60) == '["groq"]'
+    # Ollama would normally win extract; while it cools down it goes last for every task
+    assert names(router.candidates("generate")) == ["groq", "ollama"]
+    assert names(router.candidates("extract")) == ["groq", "ollama"]
+
+
+def test_cooldown_expires(monkeypatch):
+    router, groq, ollama = make_router(groq_failures=[429])
+    now = [1000.0]
+    monkeypatch.setattr(llm.time, "monotonic", lambda: now[0])
+
+    router.complete("prompt", "generate", 0.3, 60)
+    assert names(router.candidates("generate"))[0] == "ollama"
+
+    now[0] += llm.RATE_LIMIT_COOLDOWN + 1
+    assert names(router.candidates("generate"))[0] == "groq"
+
+
+def test_raises_last_error_when_every_backend_fails():
+    router, groq, ollama = make_router(groq_failures=[504], ollama_failures=[429])
+
+    with pytest.raises(HTTPException) as exc:
+        router.complete("prompt", "generate", 0.3, 60)
+    assert exc.value.status_code == 429
+    assert groq.calls == ["generate"] and ollama.calls == ["generate"]
+
+
+def test_no_backends_configured():
+    with pytest.raises(HTTPException) as exc:
+        LLMRouter([]).complete("prompt", "generate", 0.3, 60)
+    assert exc.value.status_code == 500
+
+
+def test_call_budget_allows_a_burst_then_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm.time, "monotonic", lambda: now[0])
+    budget = CallBudget(30)
+
+    # An idle minute's worth of calls is available at once, with no spacing
+    assert all(budget.try_acquire() for _ in range(30))
+    assert not budget.try_acquire()
+    assert budget.seconds_until_available() == pytest.approx(2.0)
+
+    now[0] += 2.0
+    assert budget.try_acquire()
+
+
+def test_background_calls_leave_a_reserve_for_interactive_ones():
+    router, groq, ollama = make_router()
+    router.backends = [groq]
+    groq.budget = CallBudget(4)
+
+    # Background work stops once a quarter of the budget is left
+    for _ in range(3):
+        router.complete("prompt", "generate", 0.3, 60, background=True)
+    with pytest.raises(BudgetExhausted) as exc:
+        router.complete("prompt", "generate", 0.3, 60, background=True)
+    assert exc.value.status_code == 429 and exc.value.retry_after > 0
+
+    # ...which an interactive request can still use
+    assert router.complete("prompt", "generate", 0.3, 60) == "• from groq"
+
+
+def test_budget_only_applies_to_backends_with_a_quota():
+    router, groq, ollama = make_router()
+    groq.budget = CallBudget(1)
+
+    assert router.complete("prompt", "generate", 0.3, 60) == "• from groq"
+    # Groq is out of calls: fall through to the local model, without a cooldown or error recorded
+    assert router.complete("prompt", "generate", 0.3, 60) == "• from ollama"
+    assert not router.snapshot()["groq/generate"]["cooling_down"]
+    assert router.snapshot()["groq/generate"]["error_rate"] == 0
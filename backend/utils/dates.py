@@ -0,0 +1,84 @@
+import calendar
+import re
+from datetime import date
+from typing import Optional, Tuple
+
+MONTHS = {
+    name.lower(): index
+    for index in range(1, 13)
+    for name in (calendar.month_name[index], calendar.month_abbr[index])
+}
+MONTHS["sept"] = 9
+
+ONGOING = {"present", "current", "now", "ongoing", "today"}
+
+# Years outside this range are typos ("0000", "2202"), not dates worth filtering on
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+# Date grammar shared with the LinkedIn parser, so every date line it finds parses here.
+# Compile these with re.IGNORECASE.
+_MONTH_NAME = "|".join(sorted((re.escape(name) for name in MONTHS), key=len, reverse=True))
+DATE_POINT = rf"(?:(?:{_MONTH_NAME})\.?,?\s+\d{{4}}|\d{{1,2}}\s*/\s*\d{{4}}|\d{{4}})"
+RANGE_SEPARATOR = r"\s*(?:-|–|—|\bto\b)\s*"
+DATE_RANGE = rf"{DATE_POINT}(?:{RANGE_SEPARATOR}(?:{DATE_POINT}|{'|'.join(sorted(ONGOING))}))?"
+
+_RANGE_SPLIT = re.compile(RANGE_SEPARATOR, re.IGNORECASE)
+_MONTH_YEAR = re.compile(rf"^({_MONTH_NAME})\.?,?\s+(\d{{4}})$", re.IGNORECASE)
+_NUMERIC_MONTH_YEAR = re.compile(r"^(\d{1,2})\s*/\s*(\d{4})$")
+_YEAR = re.compile(r"^(\d{4})$")
+
+
+def _parse_point(text: str, end: bool) -> Optional[date]:
+    """Parse one side of a range. End dates resolve to the last day of their month/year."""
+    text = text.strip()
+
+    match = _MONTH_YEAR.match(text)
+    if match:
+        year, month = int(match.group(2)), MONTHS[match.group(1).lower()]
+    else:
+        match = _NUMERIC_MONTH_YEAR.match(text)
+        if match and 1 <= int(match.group(1)) <= 12:
+            year, month = int(match.group(2)), int(match.group(1))
+        else:
+            match = _YEAR.match(text)
+            if not match:
+                return None
+            year = int(match.group(1))
+            month = 12 if end else 1
+
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        return None
+
+    day = calendar.monthrange(year, month)[1] if end else 1
+    return date(year, month, day)
+
+
+def parse_date_range(date_range: Optional[str]) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Parse a free-text date range like "Jan 2020 - Present" into (start_date, end_date).
+
+    end_date is None for ongoing roles. Returns (None, None) when the text can't be
+    parsed, so callers can tell "unknown" apart from "ongoing" by start_date.
+    """
+    if not date_range or not date_range.strip():
+        return None, None
+
+    # Drop LinkedIn's trailing duration, e.g. "Jan 2020 - Present · 2 yrs 3 mos"
+    text = date_range.split("·")[0].strip()
+    parts = _RANGE_SPLIT.split(text, maxsplit=1)
+
+    start = _parse_point(parts[0], end=False)
+    if start is None:
+        return None, None
+
+    if len(parts) == 1:
+        return start, _parse_point(parts[0], end=True)
+
+    if parts[1].strip().lower() in ONGOING:
+        return start, None
+
+    end = _parse_point(parts[1], end=True)
+    if end is None or end < start:
+        return None, None
+    return start, end
@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+
+from database import get_db
+from utils.embeddings import get_active_model, get_embeddings_batch, is_rejection
+
+logger = logging.getLogger(__name__)
+
+# Cohere accepts up to 96 texts per embed call
+BATCH_SIZE = 96
+POLL_INTERVAL = 5
+ERROR_BACKOFF = 30
+# Rows Cohere rejects this many times are marked 'failed' until their content
+# changes or the worker restarts
+MAX_ATTEMPTS = int(os.getenv("EMBED_MAX_ATTEMPTS", "5"))
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread = None
+
+
+def notify():
+    """Wake the worker so freshly written rows are embedded without waiting for the next poll."""
+    _wake.set()
+
+
+def _store(cur, experience_id: str, content: str, embedding: list, model: str) -> int:
+    cur.execute("""
+        UPDATE experiences
+        SET embedding = %s, embedding_model = %s, embedding_status = 'ready'
+        WHERE id = %s AND embedding_status = 'pending' AND content = %s
+          AND EXISTS (SELECT 1 FROM embedding_models WHERE model = %s AND state = 'active')
+    """, (embedding, model, experience_id, content, model))
+    return cur.rowcount
+
+
+def _record_failure(cur, experience_id: str, content: str):
+    """Count a failed attempt on one row, parking it as 'failed' once it runs out of attempts."""
+    cur.execute("""
+        UPDATE experiences
+        SET embedding_attempts = embedding_attempts + 1,
+            embedding_status = CASE WHEN embedding_attempts + 1 >= %s THEN 'failed' ELSE 'pending' END
+        WHERE id = %s AND embedding_status = 'pending' AND content = %s
+    """, (MAX_ATTEMPTS, experience_id, content))
+
+
+def embed_pending_batch() -> int:
+    """
+    Embed one batch of rows with embedding_status = 'pending'.
+    Returns the number of rows that were handled, embedded or not.
+
+    No row locks are held while Cohere is called. The UPDATE only applies if the
+    content is unchanged, so a row edited mid-flight stays pending and is picked
+    up again on the next pass. Likewise, vectors from a model that was cut over
+    while the batch was in flight are dropped rather than stored.
+
+    If Cohere rejects the batch, its rows are retried one at a time and only the
+    rows it rejects on their own are charged an attempt. Any other error (outage,
+    timeout, rate limit) is raised without counting against the rows.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    try:
+        model = get_active_model(cur)
+        # Least-tried rows first, so rows that keep failing don't starve new ones
+        cur.execute("""
+            SELECT id, content
+            FROM experiences
+            WHERE embedding_status = 'pending'
+            ORDER BY embedding_attempts, id
+            LIMIT %s
+        """, (BATCH_SIZE,))
+        rows = cur.fetchall()
+        conn.commit()
+
+        if not rows:
+            return 0
+
+        try:
+            embeddings = get_embeddings_batch([row[1] for row in rows], model=model)
+        except Exception as e:
+            if not is_rejection(e):
+                raise
+            if len(rows) > 1:
+                logger.warning("Cohere rejected a batch of %s rows, retrying them one at a time", len(rows))
+            embeddings = None
+
+        if embeddings is not None:
+            for (experience_id, content), embedding in zip(rows, embeddings):
+                _store(cur, experience_id, content, embedding, model)
+            conn.commit()
+            return len(rows)
+
+        for experience_id, content in rows:
+            try:
+                embedding = get_embeddings_batch([content], model=model)[0]
+            except Exception as e:
+                if not is_rejection(e):
+                    # Keep what was embedded so far and back off
+                    conn.commit()
+                    raise
+                logger.warning("Cohere rejected experience %s: %s", experience_id, e)
+                _record_failure(cur, experience_id, content)
+                continue
+            _store(cur, experience_id, content, embedding, model)
+        conn.commit()
+        return len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def reset_failed() -> int:
+    """Give rows parked as 'failed' a fresh set of attempts. Returns how many were reset."""
+    conn = get_db()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            UPDATE experiences
+            SET embedding_status = 'pending', embedding_attempts = 0
+            WHERE embedding_status = 'failed'
+        """)
+        reset = cur.rowcount
+        conn.commit()
+        return reset
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _run():
+    # Failures from an earlier run may have been fixed since (model change,
+    # Cohere-side fix), so each process start retries them once more
+    try:
+        reset = reset_failed()
+        if reset:
+            logger.info("Retrying %s experiences that previously failed to embed", reset)
+    except Exception:
+        logger.exception("Could not reset failed embeddings")
+
+    while not _stop.is_set():
+        _wake.wait(POLL_INTERVAL)
+        _wake.clear()
+
+        try:
+            # Drain the backlog, one Cohere call per batch
+            while not _stop.is_set() and embed_pending_batch() > 0:
+                pass
+        except Exception:
+            logger.exception("Embedding worker failed, retrying in %ss", ERROR_BACKOFF)
+            _stop.wait(ERROR_BACKOFF)
+
+
+def start():
+    """Start the background embedding worker thread (idempotent)."""
+    global _thread
+    if _thread and _thread.is_alive():
+        return
+
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="embedding-worker", daemon=True)
+    _thread.start()
+    # Pick up anything left pending by a previous process
+    notify()
+
+
+def stop():
+    """Signal the worker thread to exit and wait briefly for it."""
+    _stop.set()
+    _wake.set()
+    if _thread:
+        _thread.join(timeout=5)
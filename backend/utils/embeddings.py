@@ -1,47 +1,80 @@
 import os
 import cohere
+from utils.profiling import span
 
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 
 co = cohere.Client(COHERE_API_KEY) if COHERE_API_KEY else None
 
+# Output width of each supported Cohere embedding model
+EMBEDDING_MODELS = {
+    "embed-english-light-v3.0": 384,
+    "embed-english-v3.0": 1024,
+    "embed-multilingual-light-v3.0": 384,
+    "embed-multilingual-v3.0": 1024,
+}
+
+DEFAULT_EMBEDDING_MODEL = "embed-english-light-v3.0"
 
-def get_embedding(text: str, input_type: str = "search_document") -> list:
-    """Generate embedding vector for the given text using Cohere API."""
-    if not co:
-        raise RuntimeError("COHERE_API_KEY environment variable not set")
 
-    response = co.embed(
-        texts=[text],
-        model="embed-english-light-v3.0",
-        input_type=input_type,
-        embedding_types=["float"]
-    )
+def get_active_model(cur, lock: bool = False) -> str:
+    """
+    Return the model whose vectors are currently served from experiences.embedding.
 
-    embedding = response.embeddings.float[0]
+    With lock=True the embedding_models row is held FOR SHARE until the caller's
+    transaction ends, so a cutover can't swap columns between checking the model
+    and running the search. A locked read that waited on a cutover finds the old
+    row retired and returns nothing under READ COMMITTED; the lookup is then
+    repeated, since each new statement sees the newly active row.
+    """
+    for _ in range(3):
+        cur.execute(
+            "SELECT model FROM embedding_models WHERE state = 'active'"
+            + (" FOR SHARE" if lock else "")
+        )
+        row = cur.fetchone()
+        if row:
+            return row[0]
+        if not lock:
+            break
 
-    if len(embedding) != 384:
-        raise RuntimeError(f"Expected 384 dimensions, got {len(embedding)}")
+    raise RuntimeError("No active embedding model in embedding_models")
 
-    return embedding
+
+def is_rejection(error: Exception) -> bool:
+    """
+    True when Cohere refused this input (a 4xx other than auth or rate limiting),
+    as opposed to being unreachable or overloaded, which says nothing about the text.
+    """
+    status = getattr(error, "status_code", None)
+    return status is not None and 400 <= status < 500 and status not in (401, 403, 429)
+
+
+def get_embedding(text: str, input_type: str = "search_document", model: str = DEFAULT_EMBEDDING_MODEL) -> list:
+    """Generate embedding vector for the given text using Cohere API."""
+    return get_embeddings_batch([text], input_type=input_type, model=model)[0]
 
 
-def get_embeddings_batch(texts: list, input_type: str = "search_document") -> list:
+def get_embeddings_batch(texts: list, input_type: str = "search_document", model: str = DEFAULT_EMBEDDING_MODEL) -> list:
     """Generate embedding vectors for multiple texts in a single Cohere API call."""
     if not co:
         raise RuntimeError("COHERE_API_KEY environment variable not set")
+    if model not in EMBEDDING_MODELS:
+        raise RuntimeError(f"Unknown embedding model: {model}")
 
-    response = co.embed(
-        texts=texts,
-        model="embed-english-light-v3.0",
-        input_type=input_type,
-        embedding_types=["float"]
-    )
+    with span("embedding", f"{model} x{len(texts)}"):
+        response = co.embed(
+            texts=texts,
+            model=model,
+            input_type=input_type,
+            embedding_types=["float"]
+        )
 
     embeddings = response.embeddings.float
+    dimensions = EMBEDDING_MODELS[model]
 
     for emb in embeddings:
-        if len(emb) != 384:
-            raise RuntimeError(f"Expected 384 dimensions, got {len(emb)}")
+        if len(emb) != dimensions:
+            raise RuntimeError(f"Expected {dimensions} dimensions, got {len(emb)}")
 
     return embeddings
@@ -0,0 +1,336 @@
+import re
+from typing import List, Optional
+
+from utils.dates import DATE_RANGE, parse_date_range
+
+# Entries scoring below this are sent to the LLM instead
+CONFIDENCE_THRESHOLD = 0.6
+
+MAX_HEADER_LENGTH = 100
+
+_DATE_LINE = re.compile(rf"^(?P<range>{DATE_RANGE})\s*(?:·.*)?$", re.IGNORECASE)
+# "2 yrs 3 mos" on its own line: LinkedIn's total tenure under a company with several roles
+_DURATION_LINE = re.compile(r"^(?:\d+\s+(?:yrs?|mos?)\s*)+$", re.IGNORECASE)
+_SKILLS_LINE = re.compile(r"^skills:\s*(?P<skills>.+)$", re.IGNORECASE)
+_EMPLOYMENT_TYPE = re.compile(
+    r"\s*·\s*(?:full-time|part-time|self-employed|freelance|contract|internship|apprenticeship|seasonal|co-op)\s*$",
+    re.IGNORECASE,
+)
+_EMPLOYMENT_ONLY = re.compile(
+    r"^(?:full-time|part-time|self-employed|freelance|contract|internship|apprenticeship|seasonal|co-op)$",
+    re.IGNORECASE,
+)
+_BULLET = ("•", "-", "*", "◦", "▪")
+_LOCATION_LINE = re.compile(r"(?:·\s*(?:on-site|remote|hybrid)\s*$)|^(?:remote|hybrid|on-site)$", re.IGNORECASE)
+_ASSOCIATED_LINE = re.compile(r"^associated with\b", re.IGNORECASE)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*", re.IGNORECASE)
+
+# Causes LinkedIn prints under volunteering entries
+VOLUNTEER_CAUSES = {
+    "animal welfare", "arts and culture", "children", "civil rights and social action",
+    "disaster and humanitarian relief", "economic empowerment", "education", "environment",
+    "health", "human rights", "politics", "poverty alleviation", "science and technology",
+    "social services", "veteran support",
+}
+
+SKILL_VOCABULARY = [
+    "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Golang", "Rust", "Ruby",
+    "PHP", "Swift", "Kotlin", "Scala", "R", "MATLAB", "SQL", "Bash", "Shell", "HTML", "CSS",
+    "React", "React Native", "Redux", "Next.js", "Vue", "Vue.js", "Angular", "Svelte", "Tailwind CSS",
+    "Node.js", "Express", "Django", "Flask", "FastAPI", "Spring", "Spring Boot", "Ruby on Rails",
+    "ASP.NET", "GraphQL", "REST", "REST APIs", "gRPC", "WebSockets",
+    "PostgreSQL", "MySQL", "SQLite", "MongoDB", "Redis", "DynamoDB", "Cassandra", "Elasticsearch",
+    "Supabase", "Firebase", "pgvector", "Snowflake", "BigQuery",
+    "AWS", "Amazon Web Services", "GCP", "Google Cloud", "Azure", "Docker", "Kubernetes", "Terraform",
+    "Ansible", "Jenkins", "GitHub Actions", "CI/CD", "Linux", "Git", "Nginx", "Kafka", "RabbitMQ",
+    "Spark", "Apache Spark", "Hadoop", "Airflow", "dbt", "Pandas", "NumPy", "SciPy", "scikit-learn",
+    "TensorFlow", "PyTorch", "Keras", "OpenCV", "Hugging Face", "LangChain", "LLM", "LLMs",
+    "Machine Learning", "Deep Learning", "Computer Vision", "Natural Language Processing", "NLP",
+    "Data Analysis", "Data Science", "Data Engineering", "Data Visualization", "Tableau", "Power BI",
+    "Excel", "Figma", "Jira", "Agile", "Scrum", "Microservices", "Distributed Systems",
+    "Unit Testing", "Jest", "Pytest", "Selenium", "Cypress", "Unity", "Unreal Engine",
+    "Embedded Systems", "Arduino", "Raspberry Pi", "Verilog", "VHDL", "FPGA", "ROS", "Solidworks",
+    "AutoCAD", "Android", "iOS", "Flutter", "Dart", "Objective-C", "Vercel", "Heroku", "Railway",
+    "Stripe", "Twilio", "OAuth", "JWT", "Cohere", "OpenAI", "Groq", "Ollama",
+    "Leadership", "Public Speaking", "Project Management", "Mentoring", "Tutoring",
+]
+
+# Tokens that are skills only when written as such, never as ordinary words
+_CASE_SENSITIVE = {"C", "R", "Go", "Express", "Spring", "Excel", "Unity", "Git", "Shell", "Swift", "Dart", "Rust"}
+# Even written as such they are ordinary words at the start of a sentence ("Excel at",
+# "Spring 2020", "R&D"), so they only count inside a list or after one of these words
+_SKILL_LEAD_WORDS = {"in", "using", "with", "and", "or", "via", "including", "like", "of", "on", "to"}
+_LIST_PUNCTUATION = ",:;(/·"
+_SKILL_END = ",.;:)/·"
+
+
+def _token_spans(text: str) -> List[tuple]:
+    """(token, start, end) for each token, with trailing sentence punctuation left outside the span."""
+    spans = []
+    for match in _TOKEN.finditer(text):
+        token = match.group().rstrip(".-")
+        spans.append((token, match.start(), match.start() + len(token)))
+    return spans
+
+
+def _tokens(text: str) -> List[str]:
+    return [token for token, _, _ in _token_spans(text)]
+
+
+def _build_trie(vocabulary: List[str]) -> dict:
+    trie = {}
+    for skill in vocabulary:
+        node = trie
+        for token in _tokens(skill.lower()) or [skill.lower()]:
+            node = node.setdefault(token, {})
+        node["$"] = skill
+    return trie
+
+
+_SKILL_TRIE = _build_trie(SKILL_VOCABULARY)
+
+
+def _in_skill_context(text: str, spans: List[tuple], i: int, end: int) -> bool:
+    """Whether the ambiguous skill spanning tokens i..end-1 sits where a skill would be listed."""
+    start, stop = spans[i][1], spans[end - 1][2]
+
+    after = text[stop:stop + 1]
+    if after and not after.isspace() and after not in _SKILL_END:
+        return False
+    # "Spring 2020"
+    if after.isspace() and end < len(spans) and spans[end][0][:1].isdigit():
+        return False
+
+    before = text[:start].rstrip()
+    if before and before[-1] in _LIST_PUNCTUATION:
+        return True
+    return i > 0 and spans[i - 1][2] == len(before) and spans[i - 1][0].lower() in _SKILL_LEAD_WORDS
+
+
+def match_skills(text: str) -> List[str]:
+    """Longest-match scan of the text against the skill vocabulary trie, in order of appearance."""
+    spans = _token_spans(text)
+    raw = [token for token, _, _ in spans]
+    lowered = [token.lower() for token in raw]
+    found = []
+
+    i = 0
+    while i < len(lowered):
+        node, match, end = _SKILL_TRIE, None, i
+        for j in range(i, len(lowered)):
+            node = node.get(lowered[j])
+            if node is None:
+                break
+            if "$" in node:
+                match, end = node["$"], j + 1
+
+        if match and (
+            match not in _CASE_SENSITIVE
+            or (" ".join(raw[i:end]) == match and _in_skill_context(text, spans, i, end))
+        ):
+            if match not in found:
+                found.append(match)
+            i = end
+        else:
+            i += 1
+    return found
+
+
+def clean_lines(text: str) -> List[str]:
+    """
+    Normalise pasted LinkedIn text into lines. LinkedIn's copy output often repeats
+    each line ("EngineerEngineer" or the same line twice in a row); both are collapsed.
+    Bullet markers are kept so description lines can be told apart from headers.
+    """
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        half = len(line) // 2
+        if len(line) % 2 == 0 and half > 2 and line[:half] == line[half:]:
+            line = line[:half]
+        if lines and lines[-1] == line:
+            continue
+        lines.append(line)
+    return lines
+
+
+def _is_header_candidate(line: str) -> bool:
+    return (
+        len(line) <= MAX_HEADER_LENGTH
+        and len(line.split()) <= 12
+        and not line.startswith(_BULLET)
+        and not line.endswith((".", ":", ";", ","))
+        and not _SKILLS_LINE.match(line)
+        and not _DATE_LINE.match(line)
+        and not _DURATION_LINE.match(line)
+        and not _LOCATION_LINE.search(line)
+    )
+
+
+def _is_metadata(line: str, entry_type: str) -> bool:
+    return bool(
+        _LOCATION_LINE.search(line)
+        or _ASSOCIATED_LINE.match(line)
+        or _DURATION_LINE.match(line)
+        or _EMPLOYMENT_ONLY.match(line)
+        or (entry_type == "volunteering" and line.lower() in VOLUNTEER_CAUSES)
+    )
+
+
+def _find_header(lines: List[str], anchor: int, floor: int, entry_type: str, group: Optional[str]) -> dict:
+    """
+    Walk back from a date line to find the entry's header.
+
+    Work entries come in two layouts: a standalone role ("Title", "Company · Full-time")
+    and roles grouped under one company ("Company", "2 yrs", then "Title", "Full-time"
+    per role). Returns the header's first line index, title, organisation, the
+    company group now in effect, and a confidence penalty for ambiguous layouts.
+    """
+    i = anchor
+    typed = False
+    while i > floor and _EMPLOYMENT_ONLY.match(lines[i - 1]):
+        typed = True
+        i -= 1
+
+    if i == floor or not _is_header_candidate(lines[i - 1]):
+        return {"start": i, "title": None, "organisation": None, "group": group, "penalty": 0.5}
+
+    nearest = lines[i - 1]
+    if entry_type == "project":
+        return {"start": i - 1, "title": nearest, "organisation": None, "group": None, "penalty": 0.0}
+
+    # "Company" + "2 yrs 3 mos" directly above the role: a new company group
+    if i - 3 >= floor and _DURATION_LINE.match(lines[i - 2]) and _is_header_candidate(lines[i - 3]):
+        company = lines[i - 3]
+        return {"start": i - 3, "title": nearest, "organisation": company, "group": company, "penalty": 0.0}
+
+    standalone = " · " in nearest or entry_type == "volunteering" or group is None
+    if typed or not standalone:
+        # A role inside the current group; only certain if LinkedIn printed the bare employment type
+        return {
+            "start": i - 1, "title": nearest, "organisation": group, "group": group,
+            "penalty": 0.0 if typed and group else 0.45 if group else 0.3,
+        }
+
+    if i - 1 > floor and _is_header_candidate(lines[i - 2]):
+        organisation = _EMPLOYMENT_TYPE.sub("", nearest).strip()
+        # Without LinkedIn's "Company · Full-time" line, the line above could as well be
+        # the last line of the previous entry's description. Only trust it when that
+        # entry visibly ended: at the start of the section, right after a "Skills:"
+        # line, or below a description line that can't be a header (a sentence, a bullet).
+        if i - 2 == floor:
+            certain = floor == 0 or bool(_SKILLS_LINE.match(lines[floor - 1]))
+        else:
+            certain = not _is_header_candidate(lines[i - 3])
+        certain = certain or " · " in nearest
+        return {
+            "start": i - 2, "title": lines[i - 2], "organisation": organisation, "group": None,
+            "penalty": 0.0 if certain else 0.45,
+        }
+
+    return {"start": i - 1, "title": nearest, "organisation": None, "group": None, "penalty": 0.3}
+
+
+def parse_section(text: str, entry_type: str) -> List[dict]:
+    """
+    Split one pasted section into entries anchored on their date-range lines.
+
+    Each entry is {"type", "title", "date_range", "skills", "content", "confidence",
+    "raw"}; "raw" is the original text of the entry, for the LLM fallback.
+    """
+    lines = clean_lines(text)
+    anchors = [i for i, line in enumerate(lines) if _DATE_LINE.match(line)]
+    if not anchors:
+        return [_unparsed(entry_type, lines)] if lines else []
+
+    headers = []
+    group = None
+    for n, anchor in enumerate(anchors):
+        floor = anchors[n - 1] + 1 if n else 0
+        # LinkedIn ends an entry with its "Skills:" line, so the next header can't start above it
+        for i in range(anchor - 1, floor - 1, -1):
+            if _SKILLS_LINE.match(lines[i]):
+                floor = i + 1
+                break
+        header = _find_header(lines, anchor, floor, entry_type, group)
+        group = header["group"]
+        headers.append(header)
+
+    entries = []
+    for n, anchor in enumerate(anchors):
+        end = headers[n + 1]["start"] if n + 1 < len(anchors) else len(lines)
+        entries.append(_build_entry(entry_type, lines, headers[n], anchor, end))
+
+    # Text before the first header that we couldn't place
+    if headers[0]["start"] > 0:
+        entries[0]["confidence"] = round(max(entries[0]["confidence"] - 0.5, 0.0), 2)
+        entries[0]["raw"] = "\n".join(lines[:headers[0]["start"]]) + "\n" + entries[0]["raw"]
+
+    return entries
+
+
+def _build_entry(entry_type: str, lines: List[str], header: dict, anchor: int, end: int) -> dict:
+    confidence = 1.0 - header["penalty"]
+
+    date_range = _DATE_LINE.match(lines[anchor]).group("range").strip()
+    if parse_date_range(date_range)[0] is None:
+        confidence -= 0.3
+
+    skills, content = [], []
+    for line in lines[anchor + 1:end]:
+        skills_match = _SKILLS_LINE.match(line)
+        if skills_match:
+            skills.extend(s.strip() for s in re.split(r"\s*[·,]\s*", skills_match.group("skills")) if s.strip())
+        elif not _is_metadata(line, entry_type):
+            content.append(line)
+
+    if header["title"] and header["organisation"]:
+        title = f"{header['title']} at {header['organisation']}"
+    else:
+        title = header["title"] or "Untitled"
+
+    content_text = "\n".join(content)
+    if not content_text:
+        confidence -= 0.2
+
+    for skill in match_skills(content_text):
+        if skill.lower() not in {s.lower() for s in skills}:
+            skills.append(skill)
+
+    return {
+        "type": entry_type,
+        "title": title,
+        "date_range": date_range,
+        "skills": skills,
+        "content": content_text,
+        "confidence": round(max(confidence, 0.0), 2),
+        "raw": "\n".join(lines[header["start"]:end]),
+    }
+
+
+def _unparsed(entry_type: str, lines: List[str]) -> dict:
+    return {
+        "type": entry_type,
+        "title": "Untitled",
+        "date_range": None,
+        "skills": [],
+        "content": "\n".join(lines),
+        "confidence": 0.0,
+        "raw": "\n".join(lines),
+    }
+
+
+def parse_profile(experiences_text: Optional[str], projects_text: Optional[str],
+                  volunteering_text: Optional[str]) -> List[dict]:
+    """Parse every pasted section. Callers route entries below CONFIDENCE_THRESHOLD to the LLM."""
+    entries = []
+    for text, entry_type in (
+        (experiences_text, "work"),
+        (projects_text, "project"),
+        (volunteering_text, "volunteering"),
+    ):
+        if text and text.strip():
+            entries.extend(parse_section(text, entry_type))
+    return entries
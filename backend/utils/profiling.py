@@ -0,0 +1,247 @@
+import functools
+import hmac
+import inspect
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+
+# Requests are profiled when they send X-Profile-Token matching PROFILE_TOKEN,
+# or at random with probability PROFILE_SAMPLE_RATE. Both unset = disabled.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/resume-tailor-profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+SAMPLE_INTERVAL = 0.005
+MAX_STACK_DEPTH = 64
+# Long requests (an SSE stream polls once a second) keep only their first spans
+MAX_SPANS = 1000
+
+ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+_current: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+
+
+class Profile:
+    """Span timeline and sampled stacks for a single request."""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.status = None
+        self.spans = []
+        self.spans_dropped = 0
+        self.samples = Counter()
+        # Threads currently working on this request -> nesting depth
+        self.threads = Counter()
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def add_thread(self, thread_id: int):
+        with self.lock:
+            self.threads[thread_id] += 1
+
+    def remove_thread(self, thread_id: int):
+        with self.lock:
+            self.threads[thread_id] -= 1
+            if self.threads[thread_id] <= 0:
+                del self.threads[thread_id]
+
+    def start_sampling(self):
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.id}", daemon=True)
+        self._sampler.start()
+
+    def stop_sampling(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            # Capture under the lock so a thread handed back to the pool
+            # mid-sample isn't attributed to this request
+            with self.lock:
+                frames = sys._current_frames()
+                frames = [frames[thread_id] for thread_id in self.threads if thread_id in frames]
+            for frame in frames:
+                self.samples[_fold(frame)] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.elapsed_ms(), 3),
+            "sample_interval_ms": SAMPLE_INTERVAL * 1000,
+            "spans": self.spans,
+            "spans_dropped": self.spans_dropped,
+            # Folded stacks (root;...;leaf -> count), ready for flamegraph tools
+            "samples": dict(self.samples.most_common()),
+        }
+
+
+def _fold(frame) -> str:
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+@contextmanager
+def track_thread():
+    """Sample the calling thread for the current request's profile until the block exits."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    profile.add_thread(thread_id)
+    try:
+        yield
+    finally:
+        profile.remove_thread(thread_id)
+
+
+@contextmanager
+def span(kind: str, name: str):
+    """
+    Record a timed span (db, embedding, llm, ...) on the current request's profile.
+    A no-op apart from one context variable lookup when the request isn't profiled.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    start = profile.elapsed_ms()
+    error = None
+    try:
+        with track_thread():
+            yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        entry = {
+            "kind": kind,
+            "name": name,
+            "start_ms": round(start, 3),
+            "duration_ms": round(profile.elapsed_ms() - start, 3),
+            "thread": thread_id,
+        }
+        if error:
+            entry["error"] = error
+        with profile.lock:
+            if len(profile.spans) < MAX_SPANS:
+                profile.spans.append(entry)
+            else:
+                profile.spans_dropped += 1
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class that samples the threadpool thread running a sync endpoint for
+    exactly as long as the endpoint runs, so CPU work before the first span is
+    visible and the thread stops counting once it goes back to the pool.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if ENABLED and not inspect.iscoroutinefunction(endpoint):
+            endpoint = _tracked(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _tracked(endpoint):
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        with track_thread():
+            return endpoint(*args, **kwargs)
+    return wrapper
+
+
+def _finish(profile: Profile):
+    profile.stop_sampling()
+    _write(profile)
+
+
+def _write(profile: Profile):
+    """Write the profile and trim the directory to the newest PROFILE_MAX_FILES files."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{time.time_ns()}-{profile.id}.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(profile.to_dict(), f)
+    os.replace(tmp_path, path)
+
+    files = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for name in files[:-PROFILE_MAX_FILES]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles opted-in requests and returns X-Profile-Id.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so unprofiled requests,
+    including streaming responses, pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, scope) -> bool:
+        if PROFILE_TOKEN:
+            for key, value in scope["headers"]:
+                if key == b"x-profile-token":
+                    return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if not ENABLED or scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        # Only threads doing this request's work are sampled (see ProfiledRoute
+        # and track_thread); the event loop thread is shared and mostly idle
+        token = _current.set(profile)
+        profile.start_sampling()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _current.reset(token)
+            # Joining the sampler and writing the file both block; keep them off the event loop
+            await run_in_threadpool(_finish, profile)
@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from psycopg2.extras import Json
+
+from database import get_db
+from utils.llm import BudgetExhausted, call_llm, parse_bullets, build_bullet_prompt
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("TAILOR_MAX_WORKERS", "4"))
+MAX_RETRIES = 3
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="tailor")
+
+
+class _FairQueue:
+    """
+    Pending items grouped by user and handed out round-robin, so one user's
+    large batch shares the worker pool with everyone else's instead of
+    holding it until it finishes.
+    """
+
+    def __init__(self):
+        self.users = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, user_id: str, items: list):
+        with self.lock:
+            self.users.setdefault(user_id, deque()).extend(items)
+
+    def get(self):
+        with self.lock:
+            if not self.users:
+                return None
+            user_id, items = self.users.popitem(last=False)
+            item = items.popleft()
+            if items:
+                # Back of the line until every other user has had a turn
+                self.users[user_id] = items
+            return item
+
+
+_queue = _FairQueue()
+
+
+def hash_job_description(job_description: str) -> str:
+    """Key used to share work between identical job descriptions in a batch."""
+    return hashlib.sha256(job_description.strip().encode("utf-8")).hexdigest()
+
+
+def _call_llm(prompt: str) -> str:
+    """
+    call_llm as background work: it draws on the shared LLM call budget after
+    interactive requests. Waiting for budget is not a failed attempt; rate
+    limits and timeouts from the provider are retried with backoff.
+    """
+    attempt = 0
+    while True:
+        try:
+            return call_llm(prompt, task="generate", background=True)
+        except BudgetExhausted as e:
+            time.sleep(e.retry_after)
+        except HTTPException as e:
+            if e.status_code not in (429, 504) or attempt == MAX_RETRIES:
+                raise
+            time.sleep(2 ** attempt * 5)
+            attempt += 1
+
+
+def _finish_job_if_done(cur, job_id: str):
+    """
+    Mark the job completed once no item is left queued or running.
+
+    The job row is locked first so workers finishing the last items at the same
+    time take turns: each one's check runs after the previous one committed,
+    instead of both seeing the other's item still running and leaving the job
+    unfinished.
+    """
+    cur.execute("SELECT 1 FROM tailoring_jobs WHERE id = %s FOR UPDATE", (job_id,))
+    cur.execute("""
+        UPDATE tailoring_jobs
+        SET status = 'completed', completed_at = now()
+        WHERE id = %s AND status <> 'completed'
+          AND NOT EXISTS (
+              SELECT 1 FROM tailoring_job_items
+              WHERE job_id = %s AND status IN ('queued', 'running')
+          )
+    """, (job_id, job_id))
+
+
+def _run_item(job_id: str, jd_hash: str, job_description: str, experience_id: str, row: tuple):
+    """Generate bullets for one (job description, experience) pair and store them on every matching item."""
+    conn = get_db()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            UPDATE tailoring_job_items SET status = 'running'
+            WHERE job_id = %s AND jd_hash = %s AND experience_id = %s
+        """, (job_id, jd_hash, experience_id))
+        conn.commit()
+
+        bullets, error, status = None, None, "done"
+        try:
+            prompt = build_bullet_prompt(job_description, row[0], row[1], row[2])
+            bullets = parse_bullets(_call_llm(prompt), 3)
+        except HTTPException as e:
+            error, status = e.detail, "failed"
+        except Exception:
+            logger.exception("Tailoring item failed for job %s", job_id)
+            error, status = "An error occurred while generating bullets", "failed"
+
+        cur.execute("""
+            UPDATE tailoring_job_items
+            SET status = %s, bullets = %s, error = %s, finished_at = now()
+            WHERE job_id = %s AND jd_hash = %s AND experience_id = %s
+        """, (status, Json(bullets) if bullets is not None else None, error, job_id, jd_hash, experience_id))
+        _finish_job_if_done(cur, job_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        logger.exception("Failed to record tailoring result for job %s", job_id)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def dispatch(job_id: str):
+    """
+    Queue every unfinished item of a job on the worker pool, behind other
+    users' work in round-robin order.
+
+    Experience rows are fetched once per job, and identical job descriptions
+    are generated once and fanned out to every item that shares them.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            SELECT user_id, job_descriptions FROM tailoring_jobs WHERE id = %s
+        """, (job_id,))
+        job = cur.fetchone()
+        if job is None:
+            return
+        user_id, job_descriptions = job
+
+        cur.execute("""
+            SELECT DISTINCT jd_hash, jd_index, experience_id
+            FROM tailoring_job_items
+            WHERE job_id = %s AND status IN ('queued', 'running')
+        """, (job_id,))
+        pending = {}
+        for jd_hash, jd_index, experience_id in cur.fetchall():
+            pending.setdefault((jd_hash, experience_id), jd_index)
+
+        experience_ids = list({experience_id for _, experience_id in pending})
+        rows = {}
+        if experience_ids:
+            placeholders = ','.join(['%s'] * len(experience_ids))
+            cur.execute(f"""
+                SELECT id, title, content, skills
+                FROM experiences
+                WHERE id IN ({placeholders}) AND user_id = %s
+            """, (*experience_ids, user_id))
+            rows = {row[0]: row[1:] for row in cur.fetchall()}
+
+        missing = [eid for eid in experience_ids if eid not in rows]
+        if missing:
+            placeholders = ','.join(['%s'] * len(missing))
+            cur.execute(f"""
+                UPDATE tailoring_job_items
+                SET status = 'failed', error = 'Experience not found', finished_at = now()
+                WHERE job_id = %s AND experience_id IN ({placeholders})
+            """, (job_id, *missing))
+
+        cur.execute("""
+            UPDATE tailoring_jobs SET status = 'running' WHERE id = %s AND status = 'queued'
+        """, (job_id,))
+        _finish_job_if_done(cur, job_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    items = [
+        (job_id, jd_hash, job_descriptions[jd_index], experience_id, rows[experience_id])
+        for (jd_hash, experience_id), jd_index in pending.items()
+        if experience_id in rows
+    ]
+    _queue.put(user_id, items)
+    # One pool task per item; each runs whichever item is next in the fair queue
+    for _ in items:
+        _executor.submit(_run_next)
+
+
+def _run_next():
+    item = _queue.get()
+    if item is not None:
+        _run_item(*item)
+
+
+def resume_unfinished():
+    """Re-queue jobs left unfinished by a previous process."""
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM tailoring_jobs WHERE status <> 'completed' ORDER BY created_at")
+        job_ids = [row[0] for row in cur.fetchall()]
+        cur.close()
+        conn.close()
+
+        for job_id in job_ids:
+            dispatch(job_id)
+    except Exception:
+        logger.exception("Could not resume unfinished tailoring jobs")
+
+
+def shutdown():
+    """Stop accepting work; queued items are picked up again on the next start."""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -11,6 +11,9 @@ sleep 10
 # Setup database
 docker-compose exec backend python setup_database.py
 
+# Apply schema migrations (also backfills parsed dates)
+docker-compose exec backend python migrate.py
+
 # Migrate example data
 docker-compose exec backend python migrate_to_postgres.py
 